@@ -7,22 +7,44 @@ use chrono::{DateTime, Utc};
 use serde::{Deserialize, Serialize};
 use std::collections::HashMap;
 use std::path::PathBuf;
-use std::sync::Arc;
+use std::sync::{Arc, Mutex};
 use crate::utils::path_resolvers::get_sessions_directory as get_shared_sessions_directory;
 
 
 pub struct DevState {
     dev_service: DevService,
     pub(crate) app_state: Arc<AppState>,
+    // Serializes read-modify-write of the CLI session index
+    session_index_lock: Mutex<()>,
 }
 
+// Bump when the on-disk layout changes so the CLI can keep reading older files
+const CLI_SESSION_FILE_VERSION: u32 = 2;
+
 #[derive(Serialize, Deserialize)]
 struct CliSessionFile {
+    #[serde(default)]
+    pub version: u32,
     pub session_name: String,
     pub box_name: String,
+    pub created_at: DateTime<Utc>,
+    // Summary fields come first so the CLI can list sessions without reading the payload
+    #[serde(default)]
+    pub secrets_count: usize,
     pub session_key: String,
     pub encrypted_secrets: HashMap<String, String>,
+}
+
+// Sidecar listing every session's summary so `zap list` can skip opening each file.
+// Session names never start with '_', so this can't collide with a session file.
+const CLI_SESSION_INDEX_FILE: &str = "_index.json";
+
+#[derive(Serialize, Deserialize)]
+struct CliSessionIndexEntry {
+    pub session_name: String,
+    pub box_name: String,
     pub created_at: DateTime<Utc>,
+    pub secrets_count: usize,
 }
 
 impl DevState {
@@ -30,6 +52,7 @@ impl DevState {
         Self {
             dev_service: DevService::new(),
             app_state,
+            session_index_lock: Mutex::new(()),
         }
     }
 
@@ -268,19 +291,26 @@ impl DevState {
         let sessions_dir = self.get_sessions_directory()?;
         std::fs::create_dir_all(&sessions_dir)?;
 
-        // Convert encrypted secrets to hex format for CLI
-        let mut hex_secrets = HashMap::new();
+        // Encode each secret as hex(nonce || cipher || tag) so the CLI can slice it directly
+        let mut hex_secrets = HashMap::with_capacity(session.encrypted_secrets.len());
         for (name, encrypted_data) in &session.encrypted_secrets {
-            let serialized = serde_json::to_vec(encrypted_data)?;
-            hex_secrets.insert(name.clone(), hex::encode(serialized));
+            let mut blob = Vec::with_capacity(
+                encrypted_data.nonce.len() + encrypted_data.cipher.len() + encrypted_data.tag.len(),
+            );
+            blob.extend_from_slice(&encrypted_data.nonce);
+            blob.extend_from_slice(&encrypted_data.cipher);
+            blob.extend_from_slice(&encrypted_data.tag);
+            hex_secrets.insert(name.clone(), hex::encode(blob));
         }
 
         let cli_session = CliSessionFile {
+            version: CLI_SESSION_FILE_VERSION,
             session_name: session.session_name.clone(),
             box_name: session.box_name.clone(),
+            created_at: chrono::Utc::now(),
+            secrets_count: hex_secrets.len(),
             session_key: hex::encode(session.session_key),
             encrypted_secrets: hex_secrets,
-            created_at: chrono::Utc::now(),
         };
 
         let file_path = sessions_dir.join(format!("{}.json", session.session_name));
@@ -300,6 +330,20 @@ impl DevState {
         }
 
         std::fs::rename(temp_path, file_path)?;
+
+        // The index is only a listing shortcut, the CLI falls back to the files
+        self.update_session_index(|index| {
+            index.insert(
+                cli_session.session_name.clone(),
+                CliSessionIndexEntry {
+                    session_name: cli_session.session_name.clone(),
+                    box_name: cli_session.box_name.clone(),
+                    created_at: cli_session.created_at,
+                    secrets_count: cli_session.secrets_count,
+                },
+            );
+        });
+
         Ok(())
     }
 
@@ -311,6 +355,54 @@ impl DevState {
             std::fs::remove_file(file_path)?;
         }
 
+        self.update_session_index(|index| {
+            index.remove(session_name);
+        });
+
+        Ok(())
+    }
+
+    // Update the session index. On failure the index is removed rather than
+    // left stale, so the CLI reads the session files themselves instead
+    fn update_session_index<F>(&self, update: F)
+    where
+        F: FnOnce(&mut HashMap<String, CliSessionIndexEntry>),
+    {
+        let _guard = self.session_index_lock.lock().unwrap();
+
+        if let Err(e) = self.write_session_index(update) {
+            eprintln!("Failed to update session index: {}", e);
+            if let Ok(sessions_dir) = self.get_sessions_directory() {
+                let _ = std::fs::remove_file(sessions_dir.join(CLI_SESSION_INDEX_FILE));
+            }
+        }
+    }
+
+    // Read-modify-write the session index, replacing it atomically
+    fn write_session_index<F>(&self, update: F) -> Result<(), ZapError>
+    where
+        F: FnOnce(&mut HashMap<String, CliSessionIndexEntry>),
+    {
+        let index_path = self.get_sessions_directory()?.join(CLI_SESSION_INDEX_FILE);
+
+        let mut index: HashMap<String, CliSessionIndexEntry> = std::fs::read(&index_path)
+            .ok()
+            .and_then(|bytes| serde_json::from_slice(&bytes).ok())
+            .unwrap_or_default();
+        update(&mut index);
+
+        let temp_path = index_path.with_extension("tmp");
+        std::fs::write(&temp_path, serde_json::to_vec_pretty(&index)?)?;
+
+        #[cfg(unix)]
+        {
+            use std::os::unix::fs::PermissionsExt;
+            let mut perms = std::fs::metadata(&temp_path)?.permissions();
+            perms.set_mode(0o600); // Only owner can read/write
+            std::fs::set_permissions(&temp_path, perms)?;
+        }
+
+        std::fs::rename(temp_path, index_path)?;
         Ok(())
     }
 
@@ -7,7 +7,7 @@ with open("README.md", "r", encoding="utf-8") as fh:
 
 setup(
     name="zapc",
-    version="0.1.1",
+    version="0.2.0",
     author="Hunter Arton",
     author_email="arton.hunter@gmail.com",
     description="CLI companion for Zap credential manager - inject secrets as environment variables",
@@ -34,9 +34,12 @@ setup(
         "cryptography>=46.0.2",
         "rich>=14.1.0",
     ],
+    extras_require={
+        "fast": ["orjson>=3.9.0"],
+    },
     entry_points={
         "console_scripts": [
-            "zap=zap_cli.cli:cli",
+            "zap=zap_cli.__main__:main",
         ],
     },
     keywords="credentials secrets environment variables development",
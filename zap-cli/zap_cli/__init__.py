@@ -1,3 +1,3 @@
 """Zap CLI - Inject secrets from dev sessions as environment variables"""
 
-__version__ = "0.1.1"
+__version__ = "0.2.0"
@@ -0,0 +1,62 @@
+"""
+Zap CLI entry point
+
+Plain 'zap run -- <command>' is the hot path in scripts and CI loops, so it
+is handled here before Click and rich are imported. Everything else, and
+any problem on the fast path, goes through the full Click CLI.
+"""
+
+import os
+import sys
+from typing import List
+
+
+def main():
+    """Run the zap command"""
+    args = sys.argv[1:]
+    if len(args) > 2 and args[0] == "run" and args[1] == "--":
+        _fast_run(args[2:])
+
+    from zap_cli.cli import cli
+
+    cli()
+
+
+def _fast_run(command: List[str]) -> None:
+    """Exec command with the project's session secrets, or return to fall back
+
+    Only the happy path is handled: a missing zap.json or session, a bad key
+    or any secret that fails to decrypt returns so 'zap run' can report it.
+    """
+    from zap_cli.core import (
+        ProjectContext,
+        SessionFile,
+        decrypt_session,
+        exec_command,
+        secret_name_to_env_var,
+    )
+
+    context = ProjectContext.load()
+    if not context:
+        return
+
+    session_file = SessionFile.load(context.current_session)
+    if not session_file:
+        return
+
+    try:
+        results = decrypt_session(session_file)
+    except ValueError:
+        return
+
+    secret_vars = {}
+    for secret_name, decrypted_value, error in results:
+        if error is not None:
+            return
+        secret_vars[secret_name_to_env_var(secret_name)] = decrypted_value
+
+    exec_command(command, {**os.environ, **secret_vars})
+
+
+if __name__ == "__main__":
+    main()
@@ -3,164 +3,25 @@
 Zap CLI - Inject secrets from dev sessions as environment variables
 """
 
-import json
 import os
 import sys
 import subprocess
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional
 import click
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from rich.console import Console
-from rich.table import Table
-
-console = Console()
-
-# ================================
-# PATH RESOLUTION
-# ================================
-
-APP_IDENTIFIER = "com.devtool.zap"
-DATA_DIR = "data"
-SESSIONS_DIR = "sessions"
-BIN_DIR = "bin"
-
-
-def get_app_base_directory() -> Path:
-    """Get the base app directory (same as Rust version)"""
-    if sys.platform == "win32":
-        base = Path(os.getenv("APPDATA", "C:\\Users\\Default\\AppData\\Roaming"))
-    elif sys.platform == "darwin":
-        base = Path.home() / "Library" / "Application Support"
-    else:  # Linux
-        base = Path.home() / ".config"
-
-    return base / APP_IDENTIFIER
-
-
-def get_sessions_directory() -> Path:
-    """Get sessions directory"""
-    return get_app_base_directory() / SESSIONS_DIR
-
-
-def get_session_file_path(session_name: str) -> Path:
-    """Get path to specific session file"""
-    return get_sessions_directory() / f"{session_name}.json"
-
-
-# ================================
-# DATA STRUCTURES
-# ================================
-
-
-class SessionFile:
-    """Session file structure (matches Rust CliSessionFile)"""
-
-    def __init__(self, data: dict):
-        self.session_name = data["session_name"]
-        self.box_name = data["box_name"]
-        self.session_key = bytes.fromhex(data["session_key"])
-        self.encrypted_secrets = data["encrypted_secrets"]
-        self.created_at = data["created_at"]
-
-    @classmethod
-    def load(cls, session_name: str) -> Optional["SessionFile"]:
-        """Load session from file"""
-        session_path = get_session_file_path(session_name)
-        if not session_path.exists():
-            return None
-
-        try:
-            with open(session_path, "r") as f:
-                return cls(json.load(f))
-        except (json.JSONDecodeError, KeyError, IOError):
-            return None
-
-    @classmethod
-    def list_all(cls) -> List["SessionFile"]:
-        """List all available sessions"""
-        sessions_dir = get_sessions_directory()
-        if not sessions_dir.exists():
-            return []
-
-        sessions = []
-        for file in sessions_dir.glob("*.json"):
-            try:
-                with open(file, "r") as f:
-                    sessions.append(cls(json.load(f)))
-            except (json.JSONDecodeError, KeyError, IOError):
-                continue
-
-        return sorted(sessions, key=lambda s: s.created_at, reverse=True)
-
-
-class ProjectContext:
-    """Project context file (zap.json in current directory)"""
-
-    def __init__(self, data: dict):
-        self.app = data.get("app", "zap")
-        self.current_session = data["current_session"]
-        self.available_secrets = data.get("available_secrets", [])
-
-    @classmethod
-    def load(cls) -> Optional["ProjectContext"]:
-        """Load from current directory"""
-        zap_file = Path.cwd() / "zap.json"
-        if not zap_file.exists():
-            return None
-
-        try:
-            with open(zap_file, "r") as f:
-                return cls(json.load(f))
-        except (json.JSONDecodeError, KeyError, IOError):
-            return None
-
-    def save(self):
-        """Save to current directory"""
-        zap_file = Path.cwd() / "zap.json"
-        with open(zap_file, "w") as f:
-            json.dump(
-                {
-                    "app": self.app,
-                    "current_session": self.current_session,
-                    "available_secrets": self.available_secrets,
-                },
-                f,
-                indent=2,
-            )
-
-
-# ================================
-# CRYPTO FUNCTIONS
-# ================================
-
-
-def secret_name_to_env_var(secret_name: str, prefix: Optional[str] = None) -> str:
-    """Convert secret name to environment variable name (matches Rust)"""
-    clean_name = "".join(c if c.isalnum() else "_" for c in secret_name.upper())
-    clean_name = "_".join(filter(None, clean_name.split("_")))
-
-    if prefix:
-        clean_prefix = "".join(c if c.isalnum() else "_" for c in prefix.upper())
-        return f"{clean_prefix}_{clean_name}"
-    return clean_name
-
-
-def decrypt_secret(hex_encrypted_data: str, session_key: bytes) -> str:
-    """Decrypt secret using AES-GCM (matches Rust implementation)"""
-    serialized_data = bytes.fromhex(hex_encrypted_data)
-    encrypted_data = json.loads(serialized_data)
-
-    cipher = bytes(encrypted_data["cipher"])
-    nonce = bytes(encrypted_data["nonce"])
-    tag = bytes(encrypted_data["tag"])
-
-    aesgcm = AESGCM(session_key)
-    ciphertext = cipher + tag
-    decrypted = aesgcm.decrypt(nonce, ciphertext, None)
-
-    return decrypted.decode("utf-8")
 
+from zap_cli.core import (
+    SESSION_INDEX_FILE,
+    ProjectContext,
+    SessionFile,
+    console,
+    decrypt_session,
+    exec_command,
+    get_session_file_path,
+    get_sessions_directory,
+    scan_session_files,
+    secret_name_to_env_var,
+)
 
 # ================================
 # CLI COMMANDS
@@ -168,7 +29,7 @@ def decrypt_secret(hex_encrypted_data: str, session_key: bytes) -> str:
 
 
 @click.group()
-@click.version_option(version="0.1.1")
+@click.version_option(version="0.2.0")
 def cli():
     """Zap CLI - Inject secrets as environment variables"""
     pass
@@ -225,7 +86,7 @@ def list(session_name: Optional[str]):
 
         console.print(f"\n[dim]({len(session.encrypted_secrets)} secrets total)[/dim]")
     else:
-        sessions = SessionFile.list_all()
+        sessions = SessionFile.summaries()
 
         if not sessions:
             console.print("[dim]No active sessions found.[/dim]")
@@ -234,6 +95,8 @@ def list(session_name: Optional[str]):
 
         console.print("\n[cyan bold]Active Zap Sessions[/cyan bold]\n")
 
+        from rich.table import Table
+
         context = ProjectContext.load()
         current_session = context.current_session if context else None
 
@@ -249,7 +112,7 @@ def list(session_name: Optional[str]):
 
             table.add_row(
                 f"{marker}{session.session_name}",
-                str(len(session.encrypted_secrets)),
+                str(session.secrets_count),
                 session.box_name,
                 style=style,
             )
@@ -324,9 +187,6 @@ def run(command, session, verbose, prefix):
         console.print("[dim]Use 'zap list' to see available sessions[/dim]")
         sys.exit(1)
 
-    # Prepare environment
-    env = os.environ.copy()
-
     if verbose:
         console.print("[cyan bold]Loading secrets into environment...[/cyan bold]\n")
         console.print(f"  Using session: [green bold]{session_name}[/green bold]")
@@ -335,72 +195,79 @@ def run(command, session, verbose, prefix):
         )
 
     # Decrypt and inject secrets
-    for secret_name, hex_encrypted in session_file.encrypted_secrets.items():
-        try:
-            decrypted_value = decrypt_secret(hex_encrypted, session_file.session_key)
-            env_var_name = secret_name_to_env_var(secret_name, prefix)
-            env[env_var_name] = decrypted_value
+    try:
+        results = decrypt_session(session_file)
+    except ValueError as e:
+        console.print(f"[red]Invalid session key for '{session_name}': {e}[/red]")
+        sys.exit(1)
+
+    secret_vars = {}
+    for secret_name, decrypted_value, error in results:
+        if error is not None:
+            console.print(f"  [red]✗[/red] Failed to decrypt {secret_name}: {error}")
+            continue
+
+        env_var_name = secret_name_to_env_var(secret_name, prefix)
+        secret_vars[env_var_name] = decrypted_value
+
+        if verbose:
+            console.print(f"  [green]✓[/green] {env_var_name}")
 
-            if verbose:
-                console.print(f"  [green]✓[/green] {env_var_name}")
-        except Exception as e:
-            console.print(f"  [red]✗[/red] Failed to decrypt {secret_name}: {e}")
+    # Prepare environment in one copy-and-merge
+    env = {**os.environ, **secret_vars}
 
     if verbose:
         console.print(f"\n[cyan bold]Executing:[/cyan bold] {' '.join(command)}\n")
 
-    # Execute command
-    # FIXED: Handle Windows batch files (npm, nodemon, yarn, etc.)
-    if sys.platform == "win32":
-        # On Windows, use shell=True to handle .cmd/.bat files
-        command_str = subprocess.list2cmdline(command)
-        result = subprocess.run(command_str, env=env, shell=True)
-    else:
-        # Unix systems: direct execution
-        result = subprocess.run(command, env=env)
-
-    sys.exit(result.returncode)
+    exec_command(command, env)
 
 
 @cli.command()
 @click.argument("session_name")
 def stop(session_name: str):
     """Stop specific session"""
-    session_path = get_session_file_path(session_name)
+    try:
+        get_session_file_path(session_name).unlink()
+    except FileNotFoundError:
+        console.print(f"[red]Session '{session_name}' not found[/red]")
+        return
 
-    if session_path.exists():
-        session_path.unlink()
-        console.print(
-            f"[green]✓[/green] Session '[green bold]{session_name}[/green bold]' stopped"
-        )
+    console.print(
+        f"[green]✓[/green] Session '[green bold]{session_name}[/green bold]' stopped"
+    )
 
-        context = ProjectContext.load()
-        if context and context.current_session == session_name:
-            (Path.cwd() / "zap.json").unlink(missing_ok=True)
-            console.print("  [dim]Cleared from current project[/dim]")
-    else:
-        console.print(f"[red]Session '{session_name}' not found[/red]")
+    context = ProjectContext.load()
+    if context and context.current_session == session_name:
+        (Path.cwd() / "zap.json").unlink(missing_ok=True)
+        console.print("  [dim]Cleared from current project[/dim]")
 
 
 @cli.command()
 def clear():
     """Clear all active sessions"""
-    sessions = SessionFile.list_all()
+    session_entries = scan_session_files()
 
-    if not sessions:
+    if not session_entries:
         console.print("[dim]No active sessions to clear[/dim]")
         return
 
-    if not click.confirm(f"Are you sure you want to clear {len(sessions)} session(s)?"):
+    if not click.confirm(
+        f"Are you sure you want to clear {len(session_entries)} session(s)?"
+    ):
         console.print("Cancelled")
         return
 
-    sessions_dir = get_sessions_directory()
     cleared = 0
 
-    for file in sessions_dir.glob("*.json"):
-        file.unlink()
-        cleared += 1
+    for entry in session_entries.values():
+        try:
+            os.remove(entry.path)
+            cleared += 1
+        except FileNotFoundError:
+            continue
+
+    # The index only described the sessions that were just removed
+    (get_sessions_directory() / SESSION_INDEX_FILE).unlink(missing_ok=True)
 
     console.print(f"[green]✓[/green] Cleared {cleared} session(s)")
 
@@ -0,0 +1,453 @@
+"""
+Zap CLI core - session files, crypto and command execution
+
+Kept free of Click so the 'zap run --' fast path in __main__ can use it
+without paying Click's import cost.
+"""
+
+import functools
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    List,
+    NoReturn,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+# rich, cryptography and the thread pool are imported where they are used,
+# so commands that don't need them skip the import cost on every invocation
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is the fallback
+    orjson = None
+
+
+class _LazyConsole:
+    """Stand-in for rich's Console that imports and creates it on first use"""
+
+    _console = None
+
+    def __getattr__(self, name):
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console()
+        return getattr(self._console, name)
+
+
+console = _LazyConsole()
+
+T = TypeVar("T")
+U = TypeVar("U")
+
+# ================================
+# PATH RESOLUTION
+# ================================
+
+APP_IDENTIFIER = "com.devtool.zap"
+DATA_DIR = "data"
+SESSIONS_DIR = "sessions"
+BIN_DIR = "bin"
+
+# Summary index maintained by the desktop app (session names never start with "_")
+SESSION_INDEX_FILE = "_index.json"
+
+# Summary fields precede this key in session files written by the desktop app
+SUMMARY_END_MARKER = b'"session_key":'
+SUMMARY_READ_CHUNK = 4096
+
+# Below this many session files, thread pool setup costs more than it saves
+PARALLEL_LOAD_THRESHOLD = 4
+
+# Session file layout version (matches Rust CLI_SESSION_FILE_VERSION)
+SESSION_FILE_VERSION = 2
+NONCE_SIZE = 12
+
+
+@functools.lru_cache(maxsize=None)  # functools.cache needs Python 3.9+
+def get_app_base_directory() -> Path:
+    """Get the base app directory (same as Rust version)"""
+    if sys.platform == "win32":
+        base = Path(os.getenv("APPDATA", "C:\\Users\\Default\\AppData\\Roaming"))
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Application Support"
+    else:  # Linux
+        base = Path.home() / ".config"
+
+    return base / APP_IDENTIFIER
+
+
+@functools.lru_cache(maxsize=None)
+def get_sessions_directory() -> Path:
+    """Get sessions directory"""
+    return get_app_base_directory() / SESSIONS_DIR
+
+
+def get_session_file_path(session_name: str) -> Path:
+    """Get path to specific session file"""
+    return get_sessions_directory() / f"{session_name}.json"
+
+
+# ================================
+# JSON HELPERS
+# ================================
+
+
+def json_loads(data: bytes):
+    """Parse JSON from raw bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj) -> bytes:
+    """Serialize to indented JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode("utf-8")
+
+
+# ================================
+# DATA STRUCTURES
+# ================================
+
+
+class SessionFile:
+    """Session file structure (matches Rust CliSessionFile)"""
+
+    __slots__ = (
+        "version",
+        "session_name",
+        "box_name",
+        "_session_key_hex",
+        "_session_key",
+        "encrypted_secrets",
+        "created_at",
+    )
+
+    def __init__(self, data: dict):
+        self.version = data.get("version", 1)
+        self.session_name = data["session_name"]
+        self.box_name = data["box_name"]
+        self._session_key_hex = data["session_key"]
+        self._session_key: Optional[bytes] = None
+        self.encrypted_secrets = data["encrypted_secrets"]
+        self.created_at = data["created_at"]
+
+    @property
+    def session_key(self) -> bytes:
+        """Session key bytes, decoded on first use (only 'run' needs them)"""
+        if self._session_key is None:
+            self._session_key = bytes.fromhex(self._session_key_hex)
+        return self._session_key
+
+    @classmethod
+    def load(cls, session_name: str) -> Optional["SessionFile"]:
+        """Load session from file"""
+        return cls._load_path(str(get_session_file_path(session_name)))
+
+    @classmethod
+    def _load_path(cls, path: str) -> Optional["SessionFile"]:
+        """Load session from path, reusing the cached instance if unchanged"""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        cached = _SESSION_CACHE.get(path)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+
+        try:
+            with open(path, "rb") as f:
+                session = cls(json_loads(f.read()))
+        except (json.JSONDecodeError, KeyError, IOError):
+            return None
+
+        _SESSION_CACHE[path] = (mtime_ns, session)
+        return session
+
+    @classmethod
+    def summaries(cls) -> List["SessionSummary"]:
+        """List all sessions without parsing their key or secrets
+
+        Uses the desktop app's index for sessions whose files still exist,
+        and reads the head of any session file the index doesn't cover.
+        """
+        entries = scan_session_files()
+        index, index_mtime_ns = SessionSummary.load_index()
+
+        # The index is written after the session file, so an entry older than
+        # its file missed an update and the file's own header is read instead
+        summaries = []
+        unindexed = []
+        for name, entry in entries.items():
+            if name in index and _mtime_ns(entry) < index_mtime_ns:
+                summaries.append(index[name])
+            else:
+                unindexed.append(entry.path)
+        # File reads release the GIL, so overlap them on a small pool
+        loaded = _parallel_map(
+            SessionSummary.load, unindexed, PARALLEL_LOAD_THRESHOLD, 32
+        )
+        summaries.extend(s for s in loaded if s)
+
+        return sorted(summaries, key=lambda s: s.created_at, reverse=True)
+
+
+class SessionSummary:
+    """Session listing info read from the head of a session file"""
+
+    __slots__ = ("session_name", "box_name", "secrets_count", "created_at")
+
+    def __init__(self, data: dict):
+        self.session_name = data["session_name"]
+        self.box_name = data["box_name"]
+        self.secrets_count = data["secrets_count"]
+        self.created_at = data["created_at"]
+
+    @classmethod
+    def load_index(cls) -> Tuple[Dict[str, "SessionSummary"], int]:
+        """Load summaries from the session index, keyed by session name
+
+        Also returns the index's mtime in nanoseconds, 0 if it can't be read.
+        """
+        index_path = get_sessions_directory() / SESSION_INDEX_FILE
+        try:
+            with open(index_path, "rb") as f:
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                entries = json_loads(f.read())
+            return {name: cls(entry) for name, entry in entries.items()}, mtime_ns
+        except (ValueError, KeyError, TypeError, AttributeError, IOError):
+            return {}, 0
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SessionSummary"]:
+        """Parse only the fields before the session key, falling back to a full load"""
+        try:
+            with open(path, "rb") as f:
+                head = b""
+                while True:
+                    chunk = f.read(SUMMARY_READ_CHUNK)
+                    head += chunk
+                    end = head.find(SUMMARY_END_MARKER)
+                    if end != -1 or not chunk:
+                        break
+
+            if end != -1:
+                # Close the object right before the marker: {"a": 1, "b": 2}
+                prefix = head[:end].rstrip().rstrip(b",") + b"}"
+                return cls(json_loads(prefix))
+        except (ValueError, KeyError, IOError):
+            pass
+
+        # Older files keep created_at after the secrets and have no count
+        session = SessionFile._load_path(path)
+        if not session:
+            return None
+        return cls(
+            {
+                "session_name": session.session_name,
+                "box_name": session.box_name,
+                "secrets_count": len(session.encrypted_secrets),
+                "created_at": session.created_at,
+            }
+        )
+
+
+def scan_session_files() -> Dict[str, os.DirEntry]:
+    """Map session names to directory entries, skipping the index and other sidecars"""
+    try:
+        with os.scandir(get_sessions_directory()) as it:
+            return {
+                entry.name[: -len(".json")]: entry
+                for entry in it
+                if entry.name.endswith(".json")
+                and not entry.name.startswith("_")
+                and entry.is_file()
+            }
+    except OSError:
+        return {}
+
+
+def _mtime_ns(entry: os.DirEntry) -> int:
+    """Modification time of a scanned file, or -1 if it has gone away"""
+    try:
+        return entry.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+def _parallel_map(
+    func: Callable[[U], T], items: List[U], threshold: int, max_workers: int
+) -> List[T]:
+    """Map over items in order, using a thread pool once there are enough of them"""
+    if len(items) < threshold:
+        return [func(item) for item in items]
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+# Parsed sessions keyed by file path, invalidated when the file's mtime changes
+_SESSION_CACHE: Dict[str, Tuple[int, SessionFile]] = {}
+
+
+class ProjectContext:
+    """Project context file (zap.json in current directory)"""
+
+    __slots__ = ("app", "current_session", "available_secrets")
+
+    def __init__(self, data: dict):
+        self.app = data.get("app", "zap")
+        self.current_session = data["current_session"]
+        self.available_secrets = data.get("available_secrets", [])
+
+    @classmethod
+    def load(cls) -> Optional["ProjectContext"]:
+        """Load from current directory"""
+        zap_file = Path.cwd() / "zap.json"
+        try:
+            with open(zap_file, "rb") as f:
+                return cls(json_loads(f.read()))
+        except (json.JSONDecodeError, KeyError, IOError):
+            return None
+
+    def save(self):
+        """Save to current directory"""
+        zap_file = Path.cwd() / "zap.json"
+        data = json_dumps(
+            {
+                "app": self.app,
+                "current_session": self.current_session,
+                "available_secrets": self.available_secrets,
+            }
+        )
+
+        # Write to temp file first, then rename for atomic operation
+        temp_file = zap_file.with_suffix(".json.tmp")
+        temp_file.write_bytes(data)
+        os.replace(temp_file, zap_file)
+
+
+# ================================
+# CRYPTO FUNCTIONS
+# ================================
+
+
+# Runs of non-alphanumeric characters (\w matches str.isalnum() plus "_")
+_NON_ALNUM_RUN = re.compile(r"[\W_]+")
+# Single non-alphanumeric characters other than "_"
+_NON_WORD_CHAR = re.compile(r"\W")
+
+
+@functools.lru_cache(maxsize=1024)
+def secret_name_to_env_var(secret_name: str, prefix: Optional[str] = None) -> str:
+    """Convert secret name to environment variable name (matches Rust)"""
+    clean_name = _NON_ALNUM_RUN.sub("_", secret_name.upper()).strip("_")
+
+    if prefix:
+        clean_prefix = _NON_WORD_CHAR.sub("_", prefix.upper())
+        return f"{clean_prefix}_{clean_name}"
+    return clean_name
+
+
+def decrypt_secret(
+    hex_encrypted_data: str, aesgcm: "AESGCM", version: int = SESSION_FILE_VERSION
+) -> str:
+    """Decrypt secret using AES-GCM (matches Rust implementation)
+
+    Secrets are stored as hex(nonce || cipher || tag); version 1 files
+    stored hex(JSON) of the byte lists instead.
+    """
+    # One fromhex per secret. Joining a whole session's hex into one call and
+    # slicing it back apart measured ~20% slower, so don't batch across secrets.
+    blob = bytes.fromhex(hex_encrypted_data)
+
+    if version < 2:
+        encrypted_data = json_loads(blob)
+        blob = (
+            bytes(encrypted_data["nonce"])
+            + bytes(encrypted_data["cipher"])
+            + bytes(encrypted_data["tag"])
+        )
+
+    # AESGCM expects the tag appended to the ciphertext, which is the blob tail
+    decrypted = aesgcm.decrypt(blob[:NONCE_SIZE], blob[NONCE_SIZE:], None)
+
+    return decrypted.decode("utf-8")
+
+
+def decrypt_session(
+    session_file: SessionFile,
+) -> List[Tuple[str, Optional[str], Optional[Exception]]]:
+    """Decrypt every secret in a session, in order, as (name, value, error)
+
+    Raises ValueError if the session key itself is invalid.
+    """
+    # One cipher instance serves the whole session: it keeps the keyed
+    # OpenSSL context, so each decrypt only sets a new nonce
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    aesgcm = AESGCM(session_file.session_key)
+
+    # Decrypt serially. A decrypt takes about a microsecond, while handing one
+    # to a thread pool costs several, so a pool measured slower at every size.
+    results = []
+    for secret_name, hex_encrypted in session_file.encrypted_secrets.items():
+        try:
+            value = decrypt_secret(hex_encrypted, aesgcm, session_file.version)
+            results.append((secret_name, value, None))
+        except Exception as e:
+            results.append((secret_name, None, e))
+
+    return results
+
+
+# ================================
+# COMMAND EXECUTION
+# ================================
+
+
+def exec_command(command: List[str], env: Dict[str, str]) -> NoReturn:
+    """Run command with env and exit with its status"""
+    # FIXED: Handle Windows batch files (npm, nodemon, yarn, etc.)
+    if sys.platform == "win32":
+        import subprocess
+
+        # On Windows, use shell=True to handle .cmd/.bat files
+        command_str = subprocess.list2cmdline(command)
+        result = subprocess.run(command_str, env=env, shell=True)
+        sys.exit(result.returncode)
+
+    # Unix systems: replace this process so no Python parent waits on the child.
+    # Python ignores SIGPIPE and SIGXFSZ, and exec would pass that on, so put
+    # them back to default like subprocess's restore_signals does
+    import signal
+
+    for name in ("SIGPIPE", "SIGXFSZ"):
+        sig = getattr(signal, name, None)
+        if sig is not None:
+            signal.signal(sig, signal.SIG_DFL)
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        os.execvpe(command[0], command, env)
+    except OSError as e:
+        # e.filename is the last PATH entry tried, so name the command instead
+        console.print(f"[red]Failed to execute '{command[0]}': {e.strerror}[/red]")
+        sys.exit(127)